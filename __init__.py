@@ -3,3 +3,5 @@ def register():
     register_functions()
     from zig.printers import register_printers
     register_printers()
+    from zig.commands import register_commands
+    register_commands()
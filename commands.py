@@ -0,0 +1,896 @@
+import struct
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+
+import gdb
+
+from zig import util
+from zig.types import *
+
+
+# Heap arrays whose length is kept in another field of the same struct,
+# as {struct: {pointer field: count field}}.
+counted_arrays = {
+    'IrInstructionCall': {'args': 'arg_count'},
+    'IrInstructionContainerInitList': {'items': 'item_count'},
+    'IrInstructionContainerInitFields': {'fields': 'field_count'},
+    'IrInstructionPhi': {
+        'incoming_blocks': 'incoming_count',
+        'incoming_values': 'incoming_count',
+    },
+    'IrInstructionSwitchBr': {'cases': 'case_count'},
+    'IrInstructionCheckSwitchProngs': {'ranges': 'range_count'},
+    'ZigTypeErrorSet': {'errors': 'err_count'},
+    'ZigTypeStruct': {'fields': 'src_field_count'},
+    'ZigTypeEnum': {'fields': 'src_field_count'},
+    'ZigTypeUnion': {'fields': 'src_field_count'},
+    'FnTypeId': {'param_info': 'param_count'},
+}
+
+# Objects that record the AST node they were declared at, as
+# {struct: node field}. Instructions, scopes, top level declarations and
+# container types are handled separately.
+declared_at = {
+    'ZigFn': 'proto_node',
+    'ZigVar': 'decl_node',
+}
+
+# Buffers beyond these sizes are taken to be garbage rather than read;
+# the process may be stopped mid-update, e.g. at an OOM.
+max_array_length = 1 << 24
+max_buffer_size = 1 << 28
+
+
+def struct_target(type):
+    """Returns the struct type a pointer type points to, or None if it
+    points to anything else (including opaque structs)."""
+    target = type.target().strip_typedefs()
+    if target.code != gdb.TYPE_CODE_STRUCT:
+        return None
+    try:
+        if target.sizeof == 0 or not target.fields():
+            return None
+    except gdb.error:
+        return None
+    return target
+
+
+def field_offset(type, name):
+    """Returns the byte offset and type of a direct field of a
+    struct."""
+    for field in type.fields():
+        if field.name == name:
+            return field.bitpos // 8, field.type.strip_typedefs()
+    raise gdb.GdbError(f'{type} has no field {name}')
+
+
+class ListInfo:
+    """Where the header fields of a `ZigList<T>` live."""
+
+    def __init__(self, type):
+        self.kind = type.tag
+        self.items, items_type = field_offset(type, 'items')
+        self.length, length_type = field_offset(type, 'length')
+        self.capacity, capacity_type = field_offset(type, 'capacity')
+        self.length_size = length_type.sizeof
+        self.capacity_size = capacity_type.sizeof
+        self.elem = items_type.target().strip_typedefs()
+        self.elem_size = self.elem.sizeof
+
+
+class MapInfo:
+    """Where the header fields of a `HashMap<K, V>` and its entries
+    live."""
+
+    def __init__(self, type):
+        self.kind = type.tag
+        self.entries, entries_type = field_offset(type, '_entries')
+        self.capacity, capacity_type = field_offset(type, '_capacity')
+        self.capacity_size = capacity_type.sizeof
+        self.entry = entries_type.target().strip_typedefs()
+        self.entry_size = self.entry.sizeof
+        self.used, _ = field_offset(self.entry, 'used')
+
+
+class Layout:
+    """The flattened offsets of everything worth following inside a
+    struct.
+
+    Embedded structs are inlined, lists and hash maps are recorded
+    separately, and unions are skipped except for the `data` unions of
+    the compiler objects we know how to discriminate.
+    """
+
+    tracked = (
+        'ZigType', 'AstNode', 'ConstExprValue', 'ConstPtrValue', 'ConstParent')
+
+    def __init__(self, size=0):
+        self.size = size
+        self.pointers = []
+        self.lists = []
+        self.maps = []
+        self.embedded = []
+        self.variants = []
+        self.arrays = []
+
+    def add(self, type, base):
+        tag = type.tag or ''
+        if tag.startswith('ZigList<'):
+            self.lists.append((base, ListInfo(type)))
+            return
+        if tag.startswith('HashMap<'):
+            self.maps.append((base, MapInfo(type)))
+            return
+        if tag in self.tracked:
+            self.variants.append((base, tag))
+
+        counted = counted_arrays.get(tag, {})
+        for field in type.fields():
+            bitpos = getattr(field, 'bitpos', None)
+            if bitpos is None or field.bitsize:
+                continue
+            field_type = field.type.strip_typedefs()
+            offset = base + bitpos // 8
+            if field.name in counted and self.add_array(
+                    type, base, field_type, offset, counted[field.name]):
+                continue
+            self.add_member(field_type, offset)
+
+    def add_array(self, type, base, pointer_type, offset, count_name):
+        """Records a counted array; returns False if this version of the
+        struct does not have the count field."""
+        if pointer_type.code != gdb.TYPE_CODE_PTR:
+            return False
+        try:
+            count_offset, count_type = field_offset(type, count_name)
+        except gdb.GdbError:
+            return False
+        elem = pointer_type.target().strip_typedefs()
+        self.arrays.append(
+            (offset, base + count_offset, count_type.sizeof, elem))
+        return True
+
+    def add_member(self, type, offset):
+        if type.code == gdb.TYPE_CODE_PTR:
+            target = struct_target(type)
+            if target is not None:
+                self.pointers.append((offset, target))
+        elif type.code == gdb.TYPE_CODE_STRUCT:
+            if offset:
+                self.embedded.append((offset, type.tag))
+            self.add(type, offset)
+        elif type.code == gdb.TYPE_CODE_ARRAY:
+            elem = type.target().strip_typedefs()
+            if elem.code not in (gdb.TYPE_CODE_PTR, gdb.TYPE_CODE_STRUCT):
+                return
+            low, high = type.range()
+            for i in range(high - low + 1):
+                self.add_member(elem, offset + i * elem.sizeof)
+
+
+class AddressSet:
+    """A sparse bitmap of addresses.
+
+    Objects are at least 8-byte aligned, so each 1 MiB of address space
+    costs a 16 KiB page of bits once anything in it has been seen.
+    """
+
+    page_shift = 20
+    slot_mask = (1 << (page_shift - 3)) - 1
+
+    def __init__(self):
+        self.pages = {}
+
+    def __contains__(self, addr):
+        page = self.pages.get(addr >> self.page_shift)
+        if page is None:
+            return False
+        slot = (addr >> 3) & self.slot_mask
+        return bool(page[slot >> 3] & (1 << (slot & 7)))
+
+    def add(self, addr):
+        """Marks an address; returns False if it already was."""
+        key = addr >> self.page_shift
+        page = self.pages.get(key)
+        if page is None:
+            page = self.pages[key] = bytearray(1 << (self.page_shift - 6))
+        slot = (addr >> 3) & self.slot_mask
+        bit = 1 << (slot & 7)
+        if page[slot >> 3] & bit:
+            return False
+        page[slot >> 3] |= bit
+        return True
+
+
+class Memory:
+    """Reads inferior memory a page at a time so that neighbouring
+    objects share a single round trip.
+
+    Pages are kept in an LRU cache (16 MiB by default). The walk is
+    depth-first, so a page is usually revisited soon after it was first
+    read or not at all; larger chunks mostly transfer bytes that are
+    evicted before anything uses them. `reads` and `bytes_read` are
+    reported after the walk so the settings can be checked against the
+    size of the heap.
+    """
+
+    chunk_shift = 12
+    max_chunks = 4096
+
+    def __init__(self, inferior):
+        self.inferior = inferior
+        self.chunks = OrderedDict()
+        self.reads = 0
+        self.bytes_read = 0
+
+    def read(self, addr, size):
+        """Returns a buffer and the offset of `addr` within it."""
+        start = addr >> self.chunk_shift << self.chunk_shift
+        offset = addr - start
+        if offset + size <= 1 << self.chunk_shift:
+            chunk = self.chunk(start)
+            if chunk is not None:
+                return chunk, offset
+        return self.read_exact(addr, size), 0
+
+    def read_exact(self, addr, size):
+        self.reads += 1
+        self.bytes_read += size
+        return bytes(self.inferior.read_memory(addr, size))
+
+    def chunk(self, start):
+        try:
+            chunk = self.chunks[start]
+            self.chunks.move_to_end(start)
+            return chunk
+        except KeyError:
+            pass
+        if len(self.chunks) >= self.max_chunks:
+            self.chunks.popitem(last=False)
+        try:
+            chunk = self.read_exact(start, 1 << self.chunk_shift)
+        except gdb.MemoryError:
+            # Straddles the end of a mapping; fall back to exact reads.
+            chunk = None
+        self.chunks[start] = chunk
+        return chunk
+
+
+class Census:
+    """Walks the object graph reachable from a root and tallies bytes
+    and counts by kind and by source file.
+
+    Every object is visited once. Pointers into the middle of other
+    objects are common (e.g. to the `value` of an instruction or to an
+    element of a const array), so every object counted on its own is
+    remembered in `loose` and discounted after the walk if its container
+    turned up later. A remembered object costs 16 bytes: its address and
+    its size packed with interned kind and file indices.
+    Heap buffers (list and map storage, arrays) are tracked separately
+    from objects so that a pointer to their first element does not hide
+    the whole buffer.
+    """
+
+    def __init__(self):
+        self.mem = Memory(gdb.selected_inferior())
+        self.visited = AddressSet()
+        self.embedded = AddressSet()
+        self.buffers = AddressSet()
+        self.loose = array('Q')
+        self.interned = {}
+        self.names = []
+        self.stack = []
+        self.kinds = defaultdict(lambda: [0, 0])
+        self.files = defaultdict(lambda: [0, 0])
+        self.unreadable = 0
+        self.interrupted = False
+
+        # The target may not share the host's byte order, e.g. when
+        # debugging remotely.
+        endian = gdb.execute('show endian', to_string=True)
+        self.byteorder = 'big' if 'big endian' in endian else 'little'
+        ptr_size = gdb.lookup_type('void').pointer().sizeof
+        self.ptr_format = ('>' if self.byteorder == 'big' else '<') + (
+            'Q' if ptr_size == 8 else 'I')
+        self.ptr_size = ptr_size
+
+        self.layouts = {}
+        self.variant_layouts = {}
+        self.derived_types = {}
+        self.type_ids = {}
+        self.type_lengths = {}
+        self.paths = {}
+        self.node_offsets = {}
+        self.base_tags = {}
+
+        # Structs that are allocated as one of several larger structs
+        # embedding them as `base`, chosen by their `id`.
+        self.derived = {
+            'IrInstruction': (IrInstructionId, util.instruction_type_name),
+            'Scope': (ScopeId, util.scope_type_name),
+            'Tld': (TldId, util.tld_type_name),
+        }
+        self.base_types = {
+            tag: gdb.lookup_type(tag).strip_typedefs() for tag in self.derived
+        }
+        self.base_ids = {tag: self.field(tag, 'id') for tag in self.derived}
+        self.base_nodes = {
+            tag: self.field(tag, 'source_node')[0] for tag in self.derived
+        }
+
+        self.type_id = self.field('ZigType', 'id')
+        self.type_data = self.field('ZigType', 'data')
+        self.type_child = self.field('ZigType', 'data', 'maybe', 'child_type')
+        self.type_field_count = self.field(
+            'ZigType', 'data', 'structure', 'src_field_count')
+        self.type_array_len = self.field('ZigType', 'data', 'array', 'len')
+
+        self.node_type = self.field('AstNode', 'type')
+        self.node_owner = self.field('AstNode', 'owner')
+        self.node_data = self.field('AstNode', 'data')
+        self.owner_type = self.node_owner[1].target().strip_typedefs()
+
+        self.const_type = gdb.lookup_type('ConstExprValue').strip_typedefs()
+        self.const_special = self.field('ConstExprValue', 'special')
+        self.const_val_type = self.field('ConstExprValue', 'type')
+        self.const_data = self.field('ConstExprValue', 'data')
+        self.struct_fields = self.field(
+            'ConstExprValue', 'data', 'x_struct', 'fields')
+        self.array_special = self.field(
+            'ConstExprValue', 'data', 'x_array', 'special')
+        self.array_elements = self.field(
+            'ConstExprValue', 'data', 'x_array', 'data', 's_none', 'elements')
+        self.array_buf = self.field(
+            'ConstExprValue', 'data', 'x_array', 'data', 's_buf')
+        self.array_buf_type = struct_target(self.array_buf[1])
+
+        # Unions whose active member is named by a sibling field, as
+        # {struct: (discriminant, union, variant for discriminant)}.
+        self.unions = {
+            'ZigType': (self.type_id, self.type_data,
+                lambda id: util.type_data_variant(ZigTypeId(id))),
+            'AstNode': (self.node_type, self.node_data,
+                lambda id: util.ast_node_type_variant(NodeType(id))),
+            'ConstPtrValue': (
+                self.field('ConstPtrValue', 'special'),
+                self.field('ConstPtrValue', 'data'),
+                lambda id: util.const_ptr_variant(ConstPtrSpecial(id))),
+            'ConstParent': (
+                self.field('ConstParent', 'id'),
+                self.field('ConstParent', 'data'),
+                lambda id: util.const_parent_variant(ConstParentId(id))),
+        }
+
+    def field(self, type_name, *names):
+        """Returns the offset, type and size of a field, following
+        `names` through nested structs and unions."""
+        type = gdb.lookup_type(type_name).strip_typedefs()
+        offset = 0
+        for name in names:
+            field_off, type = field_offset(type, name)
+            offset += field_off
+        return offset, type, type.sizeof
+
+    def run(self, addr, type):
+        """Walks the graph; stops early and keeps the partial tallies
+        if interrupted."""
+        self.push(addr, type, None)
+        try:
+            while self.stack:
+                addr, type, file, count = self.stack.pop()
+                if count == 1 and addr in self.embedded:
+                    continue
+                try:
+                    self.visit(addr, type, file, count)
+                except gdb.error:
+                    self.unreadable += 1
+        except KeyboardInterrupt:
+            self.interrupted = True
+        self.discount()
+
+    # Reading
+
+    def ptr(self, buf, offset):
+        return struct.unpack_from(self.ptr_format, buf, offset)[0]
+
+    def uint(self, buf, offset, size):
+        return int.from_bytes(buf[offset:offset + size], self.byteorder)
+
+    def layout(self, type):
+        tag = type.tag
+        try:
+            return self.layouts[tag]
+        except KeyError:
+            pass
+        layout = Layout(type.sizeof)
+        layout.add(type, 0)
+        if tag is not None:
+            self.layouts[tag] = layout
+        return layout
+
+    def variant_layout(self, owner, field, variant):
+        """Returns the layout of one member of a `data` union."""
+        offset, union, _ = field
+        key = (owner, variant)
+        try:
+            return self.variant_layouts[key]
+        except KeyError:
+            layout = self.variant_layouts[key] = Layout()
+            try:
+                member = union[variant].type.strip_typedefs()
+            except KeyError:
+                # Not present in this compiler version.
+                return layout
+            layout.add_member(member, offset)
+            return layout
+
+    def source_file(self, owner):
+        if not owner:
+            return None
+        try:
+            return self.paths[owner]
+        except KeyError:
+            pass
+        try:
+            val = gdb.Value(owner).cast(self.owner_type.pointer())
+            path = util.buf_to_string(val['path'])
+        except (gdb.error, gdb.MemoryError):
+            path = None
+        self.paths[owner] = path
+        return path
+
+    def read_ptr(self, addr):
+        buf, base = self.mem.read(addr, self.ptr_size)
+        return self.ptr(buf, base)
+
+    def node_file(self, node):
+        if not node:
+            return None
+        return self.source_file(self.read_ptr(node + self.node_owner[0]))
+
+    def zig_type_id(self, addr):
+        """Returns the `ZigTypeId` of the type at an address."""
+        try:
+            return self.type_ids[addr]
+        except KeyError:
+            pass
+        offset, _, size = self.type_id
+        buf, base = self.mem.read(addr + offset, size)
+        try:
+            id = ZigTypeId(self.uint(buf, base, size))
+        except ValueError:
+            id = None
+        self.type_ids[addr] = id
+        return id
+
+    def type_length(self, addr, field):
+        """Returns a length recorded in the type at an address, e.g. the
+        number of fields of a struct."""
+        offset, _, size = field
+        try:
+            return self.type_lengths[addr, offset]
+        except KeyError:
+            pass
+        buf, base = self.mem.read(addr + offset, size)
+        length = self.type_lengths[addr, offset] = self.uint(buf, base, size)
+        return length
+
+    # Walking
+
+    def push(self, addr, type, file, count=1):
+        if not addr or not count:
+            return
+        if count > 1:
+            if not self.plausible(count, type.sizeof):
+                return
+            if not self.buffers.add(addr):
+                return
+        elif not self.visited.add(addr):
+            return
+        self.stack.append((addr, type, file, count))
+
+    def plausible(self, count, size):
+        """Tests if a buffer of `count` elements of `size` bytes could
+        be real; counts it as unreadable if not."""
+        if count <= max_array_length and count * size <= max_buffer_size:
+            return True
+        self.unreadable += 1
+        return False
+
+    def embed(self, addr):
+        """Marks an address as part of a larger object."""
+        self.visited.add(addr)
+        self.embedded.add(addr)
+
+    def intern(self, name):
+        try:
+            return self.interned[name]
+        except KeyError:
+            index = self.interned[name] = len(self.names)
+            self.names.append(name)
+            return index
+
+    def remember(self, addr, kind, file, size):
+        """Records an object counted on its own in case it turns out to
+        be embedded in another."""
+        if size >> 24:
+            return
+        self.loose.append(addr)
+        self.loose.append(
+            size << 40 | self.intern(kind) << 20 | self.intern(file))
+
+    def discount(self):
+        """Takes back objects counted on their own that were later found
+        inside another object."""
+        loose = self.loose
+        for i in range(0, len(loose), 2):
+            if loose[i] in self.embedded:
+                info = loose[i + 1]
+                kind = self.names[info >> 20 & 0xfffff]
+                file = self.names[info & 0xfffff]
+                self.tally(kind, file, -(info >> 40), -1)
+        self.loose = array('Q')
+
+    def tally(self, kind, file, size, count=1):
+        entry = self.kinds[kind]
+        entry[0] += count
+        entry[1] += size
+        entry = self.files[file or '(unknown)']
+        entry[0] += count
+        entry[1] += size
+
+    def base_tag(self, type):
+        """Returns which of the `derived` base structs a struct is or
+        embeds as `base`, e.g. `IrInstruction` for `IrInstructionCall`,
+        or None."""
+        tag = type.tag
+        try:
+            return self.base_tags[tag]
+        except KeyError:
+            pass
+        result = tag if tag in self.derived else None
+        if result is None:
+            fields = type.fields()
+            if fields and fields[0].name == 'base':
+                first = fields[0].type.strip_typedefs().tag
+                if first in self.derived:
+                    result = first
+        if tag is not None:
+            self.base_tags[tag] = result
+        return result
+
+    def visit(self, addr, type, file, count):
+        # Dispatch on the id rather than the pointer's static type, so
+        # that e.g. a `Scope *` and a `ScopeDecls *` to the same object
+        # both see the whole `ScopeDecls`. The elements of an array all
+        # have its static type, so arrays take the generic path.
+        base_tag = self.base_tag(type)
+        if base_tag is not None and count == 1:
+            self.visit_derived(addr, base_tag, file)
+            return
+
+        layout = self.layout(type)
+        size = layout.size
+        buf, base = self.mem.read(addr, size * count)
+        for i in range(count):
+            offset = base + i * size
+            elem_addr = addr + i * size
+            if count > 1:
+                self.embed(elem_addr)
+            kind, elem_file = self.classify(type, buf, offset, file)
+            self.tally(kind, elem_file, size)
+            if count == 1:
+                self.remember(addr, kind, elem_file, size)
+            self.scan(buf, offset, elem_addr, layout, elem_file)
+
+    def visit_derived(self, addr, base_tag, file):
+        offset, _, size = self.base_ids[base_tag]
+        buf, base = self.mem.read(addr + offset, size)
+        id = self.uint(buf, base, size)
+        try:
+            type = self.derived_types[base_tag, id]
+        except KeyError:
+            enum, type_name = self.derived[base_tag]
+            try:
+                name = type_name(enum(id))
+            except ValueError:
+                name = None
+            type = self.base_types[base_tag]
+            if name:
+                try:
+                    type = gdb.lookup_type(name).strip_typedefs()
+                except gdb.error:
+                    # Not every compiler version has every variant.
+                    pass
+            self.derived_types[base_tag, id] = type
+
+        layout = self.layout(type)
+        buf, base = self.mem.read(addr, layout.size)
+        node = self.ptr(buf, base + self.base_nodes[base_tag])
+        file = self.node_file(node)
+        self.tally(type.tag, file, layout.size)
+        self.remember(addr, type.tag, file, layout.size)
+        self.scan(buf, base, addr, layout, file)
+
+    def node_offset(self, key, type, name):
+        """Returns the offset of an `AstNode *` field, or None if this
+        version of the struct has no such field."""
+        try:
+            return self.node_offsets[key]
+        except KeyError:
+            pass
+        try:
+            offset, _ = field_offset(type, name)
+        except gdb.GdbError:
+            offset = None
+        self.node_offsets[key] = offset
+        return offset
+
+    def type_decl_node(self, id):
+        """Returns the offset of the declaration node of a type, or None
+        if types with this id have none."""
+        variant = util.type_data_variant(id)
+        if variant not in ('structure', 'enumeration', 'unionation'):
+            return None
+        data_off, union, _ = self.type_data
+        try:
+            member = union[variant].type.strip_typedefs()
+        except KeyError:
+            return None
+        offset = self.node_offset(('ZigType', variant), member, 'decl_node')
+        return None if offset is None else data_off + offset
+
+    def classify(self, type, buf, offset, file):
+        """Returns the kind and source file of an object.
+
+        An object's file is that of the node it was declared at if it
+        has one, otherwise `file`, which is only given for storage owned
+        by an object that has a file.
+        """
+        tag = type.tag
+        if tag == 'ZigType':
+            field_off, _, size = self.type_id
+            try:
+                id = ZigTypeId(self.uint(buf, offset + field_off, size))
+            except ValueError:
+                return tag, file
+            node_off = self.type_decl_node(id)
+            if node_off is not None:
+                node = self.ptr(buf, offset + node_off)
+                file = self.node_file(node) or file
+            return f'ZigType({id.name})', file
+        if tag == 'AstNode':
+            field_off, _, size = self.node_type
+            owner = self.ptr(buf, offset + self.node_owner[0])
+            file = self.source_file(owner) or file
+            try:
+                id = NodeType(self.uint(buf, offset + field_off, size))
+                return f'AstNode({id.name})', file
+            except ValueError:
+                return tag, file
+        if tag in declared_at:
+            node_off = self.node_offset(tag, type, declared_at[tag])
+            if node_off is not None:
+                file = self.node_file(self.ptr(buf, offset + node_off)) or file
+        return tag or str(type), file
+
+    def scan(self, buf, offset, addr, layout, file):
+        """Follows everything reachable from one object."""
+        for field_off, _ in layout.embedded:
+            self.embed(addr + field_off)
+        for field_off, tag in layout.variants:
+            if tag == 'ConstExprValue':
+                self.scan_const(
+                    buf, offset + field_off, addr + field_off, file)
+            else:
+                self.scan_union(
+                    tag, buf, offset + field_off, addr + field_off, file)
+        for field_off, target in layout.pointers:
+            self.push(self.ptr(buf, offset + field_off), target, None)
+        for field_off, info in layout.lists:
+            self.scan_list(buf, offset + field_off, info, file)
+        for field_off, info in layout.maps:
+            self.scan_map(buf, offset + field_off, info, file)
+        for field_off, count_off, count_size, elem in layout.arrays:
+            items = self.ptr(buf, offset + field_off)
+            count = self.uint(buf, offset + count_off, count_size)
+            self.scan_array(items, count, elem, file)
+
+    def scan_array(self, items, count, elem, file):
+        if not items or not count:
+            return
+        if elem.code == gdb.TYPE_CODE_STRUCT:
+            self.push(items, elem, file, count)
+            return
+        if not self.plausible(count, elem.sizeof):
+            return
+        if not self.buffers.add(items):
+            return
+        self.tally(f'{elem}[]', file, count * elem.sizeof)
+
+        target = None
+        if elem.code == gdb.TYPE_CODE_PTR:
+            target = struct_target(elem)
+        if target is None:
+            return
+        buf, base = self.mem.read(items, count * self.ptr_size)
+        for i in range(count):
+            self.push(self.ptr(buf, base + i * self.ptr_size), target, None)
+
+    def scan_list(self, buf, offset, info, file):
+        items = self.ptr(buf, offset + info.items)
+        length = self.uint(buf, offset + info.length, info.length_size)
+        capacity = self.uint(buf, offset + info.capacity, info.capacity_size)
+        if not items or not capacity or length > capacity:
+            return
+        if not self.plausible(capacity, info.elem_size):
+            return
+        if not self.buffers.add(items):
+            return
+        self.tally(info.kind, file, capacity * info.elem_size)
+
+        elem = info.elem
+        if elem.code == gdb.TYPE_CODE_PTR:
+            target = struct_target(elem)
+            if target is None or not length:
+                return
+            buf, base = self.mem.read(items, length * info.elem_size)
+            for i in range(length):
+                self.push(self.ptr(buf, base + i * info.elem_size), target,
+                    None)
+        elif elem.code == gdb.TYPE_CODE_STRUCT:
+            if not length:
+                return
+            layout = self.layout(elem)
+            buf, base = self.mem.read(items, length * info.elem_size)
+            for i in range(length):
+                addr = items + i * info.elem_size
+                self.embed(addr)
+                self.scan(buf, base + i * info.elem_size, addr, layout, file)
+
+    def scan_map(self, buf, offset, info, file):
+        entries = self.ptr(buf, offset + info.entries)
+        capacity = self.uint(buf, offset + info.capacity, info.capacity_size)
+        if not entries or not capacity:
+            return
+        if not self.plausible(capacity, info.entry_size):
+            return
+        if not self.buffers.add(entries):
+            return
+        self.tally(info.kind, file, capacity * info.entry_size)
+
+        layout = self.layout(info.entry)
+        buf, base = self.mem.read(entries, capacity * info.entry_size)
+        for i in range(capacity):
+            entry = base + i * info.entry_size
+            if buf[entry + info.used]:
+                self.scan(buf, entry, entries + i * info.entry_size, layout,
+                    file)
+
+    def scan_union(self, tag, buf, offset, addr, file):
+        """Follows the active member of a discriminated union."""
+        (field_off, _, size), union, variant_of = self.unions[tag]
+        try:
+            variant = variant_of(self.uint(buf, offset + field_off, size))
+        except ValueError:
+            return
+        if variant:
+            layout = self.variant_layout(tag, union, variant)
+            self.scan(buf, offset, addr, layout, file)
+
+    def scan_const(self, buf, offset, addr, file):
+        field_off, _, size = self.const_special
+        special = self.uint(buf, offset + field_off, size)
+        if special != ConstValSpecial.ConstValSpecialStatic.value:
+            return
+        type = self.ptr(buf, offset + self.const_val_type[0])
+        if not type:
+            return
+        type_id = self.zig_type_id(type)
+        if type_id is None:
+            return
+        child_id = None
+        if type_id == ZigTypeId.ZigTypeIdOptional:
+            child = self.read_ptr(type + self.type_child[0])
+            if child:
+                child_id = self.zig_type_id(child)
+        variant = util.const_data_variant(type_id, child_id)
+        if not variant:
+            return
+
+        # Aggregates point at arrays of values whose length is only
+        # recorded in their type; the generic scan below only sees the
+        # first element.
+        if variant == 'x_struct':
+            fields = self.ptr(buf, offset + self.struct_fields[0])
+            count = self.type_length(type, self.type_field_count)
+            self.push(fields, self.const_type, file, count)
+        elif variant == 'x_array':
+            field_off, _, size = self.array_special
+            special = self.uint(buf, offset + field_off, size)
+            if special == ConstArraySpecial.ConstArraySpecialNone.value:
+                elements = self.ptr(buf, offset + self.array_elements[0])
+                count = self.type_length(type, self.type_array_len)
+                self.push(elements, self.const_type, file, count)
+            elif (special == ConstArraySpecial.ConstArraySpecialBuf.value
+                    and self.array_buf_type is not None):
+                array = self.ptr(buf, offset + self.array_buf[0])
+                self.push(array, self.array_buf_type, file)
+
+        layout = self.variant_layout(
+            'ConstExprValue', self.const_data, variant)
+        self.scan(buf, offset, addr, layout, file)
+
+
+def print_table(title, rows):
+    # Kinds can drop to zero once embedded objects are discounted.
+    rows = sorted(
+        ((name, row) for name, row in rows.items() if row[0]),
+        key=lambda item: item[1][1], reverse=True)
+    total_count = sum(count for _, (count, _) in rows)
+    total_bytes = sum(size for _, (_, size) in rows)
+    width = max([len(title)] + [len(name) for name, _ in rows])
+    print(f'{title:<{width}}  {"Count":>12}  {"Bytes":>16}')
+    for name, (count, size) in rows:
+        print(f'{name:<{width}}  {count:>12,}  {size:>16,}')
+    print(f'{"Total":<{width}}  {total_count:>12,}  {total_bytes:>16,}')
+
+
+class MemCommand(gdb.Command):
+    """Breaks down the heap footprint of compiler objects.
+
+Usage: zig-mem EXPR
+
+Walks every object reachable from EXPR (typically the CodeGen `g`)
+and prints the bytes and counts of IR instructions (by casted struct),
+const values, types (by ZigTypeId), AST nodes (by NodeType), the
+storage of ZigLists and HashMaps, and any other structs found along
+the way, first by kind and then by source file.
+
+An object is attributed to a file only through a node it records:
+the owner of an AST node, the source node of an instruction, scope or
+top level declaration, the declaration of a container type, function
+or variable. List, map and array storage, and values embedded in an
+object, go with the object that owns them. Everything else, notably
+most const values, is listed as (unknown)."""
+
+    def __init__(self):
+        super(MemCommand, self).__init__('zig-mem', gdb.COMMAND_DATA)
+
+    def invoke(self, arg, from_tty):
+        if not arg:
+            raise gdb.GdbError('usage: zig-mem EXPR')
+
+        val = gdb.parse_and_eval(arg)
+        type = val.type.strip_typedefs()
+        if type.code == gdb.TYPE_CODE_PTR:
+            target = struct_target(type)
+            addr = int(val)
+        elif type.code == gdb.TYPE_CODE_STRUCT and val.address is not None:
+            target = type
+            addr = int(val.address)
+        else:
+            raise gdb.GdbError(f'{arg} is not a struct or struct pointer')
+        if target is None:
+            raise gdb.GdbError(f'{arg} does not point to a struct')
+
+        census = Census()
+        start = time.monotonic()
+        census.run(addr, target)
+        elapsed = time.monotonic() - start
+        if census.interrupted:
+            print('Interrupted; the tables below are partial.\n')
+
+        print_table('Kind', census.kinds)
+        print()
+        print_table('File', census.files)
+        if census.unreadable:
+            print(f'\n{census.unreadable:,} objects could not be read')
+        mem = census.mem
+        print(f'\nRead {mem.bytes_read:,} bytes in {mem.reads:,} reads; '
+            f'walked in {elapsed:.1f}s')
+
+
+def register_commands():
+    MemCommand()
@@ -60,16 +60,6 @@ class ZigListPrinter(BasicPrinter):
 class ConstParentPrinter(BasicPrinter):
     name = 'ConstParent'
 
-    variants = {
-        ConstParentId.ConstParentIdStruct: 'p_struct',
-        ConstParentId.ConstParentIdErrUnionCode: 'p_err_union_code',
-        ConstParentId.ConstParentIdErrUnionPayload: 'p_err_union_payload',
-        ConstParentId.ConstParentIdOptionalPayload: 'p_optional_payload',
-        ConstParentId.ConstParentIdArray: 'p_array',
-        ConstParentId.ConstParentIdUnion: 'p_union',
-        ConstParentId.ConstParentIdScalar: 'p_scalar',
-    }
-
     def __init__(self, val):
         self.val = val
 
@@ -77,7 +67,7 @@ class ConstParentPrinter(BasicPrinter):
         return str(self.val['id'])
 
     def children(self):
-        variant = self.variants.get(ConstParentId(self.val['id']))
+        variant = util.const_parent_variant(ConstParentId(self.val['id']))
         if variant:
             return util.value_items(self.val['data'][variant])
         else:
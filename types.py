@@ -16,8 +16,12 @@ def zig_enum(name):
     return res
 
 
+ConstArraySpecial = zig_enum('ConstArraySpecial')
 ConstParentId = zig_enum('ConstParentId')
+ConstPtrSpecial = zig_enum('ConstPtrSpecial')
 ConstValSpecial = zig_enum('ConstValSpecial')
 IrInstructionId = zig_enum('IrInstructionId')
 NodeType = zig_enum('NodeType')
+ScopeId = zig_enum('ScopeId')
+TldId = zig_enum('TldId')
 ZigTypeId = zig_enum('ZigTypeId')
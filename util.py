@@ -95,6 +95,32 @@ def const_data(const_val):
             raise ValueError(f'unexpected float size: {bit_count}')
         return variant
 
+    child_id = None
+    if type_id == ZigTypeId.ZigTypeIdOptional:
+        child = type['data']['maybe']['child_type']
+        if not is_null(child):
+            child_id = ZigTypeId(child['id'])
+    return const_data_variant(type_id, child_id)
+
+
+def const_data_variant(type_id, child_id=None):
+    """Returns the `data` variant of a static value of a non-float
+    type.
+
+    `child_id` is the id of the child type of an optional. As in the
+    compiler's `get_codegen_ptr_type`, optional pointers and functions
+    are stored as pointers.
+    """
+    pointer_like = (
+        ZigTypeId.ZigTypeIdPointer,
+        ZigTypeId.ZigTypeIdFn,
+        ZigTypeId.ZigTypeIdPromise,
+    )
+    if type_id in pointer_like:
+        return 'x_ptr'
+    if type_id == ZigTypeId.ZigTypeIdOptional and child_id in pointer_like:
+        return 'x_ptr'
+
     variants = {
         ZigTypeId.ZigTypeIdInt: 'x_bigint',
         ZigTypeId.ZigTypeIdComptimeInt: 'x_bigint',
@@ -109,15 +135,49 @@ def const_data(const_val):
         ZigTypeId.ZigTypeIdStruct: 'x_struct',
         ZigTypeId.ZigTypeIdUnion: 'x_union',
         ZigTypeId.ZigTypeIdArray: 'x_array',
-        ZigTypeId.ZigTypeIdPointer: 'x_ptr',
         ZigTypeId.ZigTypeIdNamespace: 'x_import',
         ZigTypeId.ZigTypeIdArgTuple: 'x_arg_tuple',
     }
     return variants.get(type_id)
 
 
+def const_ptr_variant(special):
+    """Returns the `data` variant of a `ConstPtrValue`."""
+    variants = {
+        ConstPtrSpecial.ConstPtrSpecialRef: 'ref',
+        ConstPtrSpecial.ConstPtrSpecialBaseArray: 'base_array',
+        ConstPtrSpecial.ConstPtrSpecialBaseStruct: 'base_struct',
+        ConstPtrSpecial.ConstPtrSpecialBaseErrorUnionCode:
+            'base_err_union_code',
+        ConstPtrSpecial.ConstPtrSpecialBaseErrorUnionPayload:
+            'base_err_union_payload',
+        ConstPtrSpecial.ConstPtrSpecialBaseOptionalPayload:
+            'base_optional_payload',
+        ConstPtrSpecial.ConstPtrSpecialHardCodedAddr: 'hard_coded_addr',
+        ConstPtrSpecial.ConstPtrSpecialFunction: 'fn',
+    }
+    return variants.get(special)
+
+
+def const_parent_variant(id):
+    """Returns the `data` variant of a `ConstParent`."""
+    variants = {
+        ConstParentId.ConstParentIdStruct: 'p_struct',
+        ConstParentId.ConstParentIdErrUnionCode: 'p_err_union_code',
+        ConstParentId.ConstParentIdErrUnionPayload: 'p_err_union_payload',
+        ConstParentId.ConstParentIdOptionalPayload: 'p_optional_payload',
+        ConstParentId.ConstParentIdArray: 'p_array',
+        ConstParentId.ConstParentIdUnion: 'p_union',
+        ConstParentId.ConstParentIdScalar: 'p_scalar',
+    }
+    return variants.get(id)
+
+
 def type_data(type):
-    id = ZigTypeId(type['id'])
+    return type_data_variant(ZigTypeId(type['id']))
+
+
+def type_data_variant(id):
     variants = {
         ZigTypeId.ZigTypeIdPointer: 'pointer',
         ZigTypeId.ZigTypeIdInt: 'integral',
@@ -138,7 +198,17 @@ def type_data(type):
 
 
 def cast_instruction(inst):
-    id = IrInstructionId(inst['id'])
+    type_name = instruction_type_name(IrInstructionId(inst['id']))
+    if not type_name:
+        return None
+
+    casted_type = gdb.lookup_type(type_name)
+    return inst.address.reinterpret_cast(casted_type.pointer())
+
+
+def instruction_type_name(id):
+    """Returns the name of the struct an instruction with the given
+    id is cast to."""
     variants = {
         IrInstructionId.IrInstructionIdDeclVarSrc: 'IrInstructionDeclVarSrc',
         IrInstructionId.IrInstructionIdDeclVarGen: 'IrInstructionDeclVarGen',
@@ -288,15 +358,46 @@ def cast_instruction(inst):
         IrInstructionId.IrInstructionIdVectorToArray: 'IrInstructionVectorToArray',
         IrInstructionId.IrInstructionIdArrayToVector: 'IrInstructionArrayToVector',
     }
-    type_name = variants.get(id)
-    if not type_name:
-        return None
+    return variants.get(id)
 
-    casted_type = gdb.lookup_type(type_name)
-    return inst.address.reinterpret_cast(casted_type.pointer())
+
+def scope_type_name(id):
+    """Returns the name of the struct a scope with the given id is cast
+    to."""
+    variants = {
+        ScopeId.ScopeIdDecls: 'ScopeDecls',
+        ScopeId.ScopeIdBlock: 'ScopeBlock',
+        ScopeId.ScopeIdDefer: 'ScopeDefer',
+        ScopeId.ScopeIdDeferExpr: 'ScopeDeferExpr',
+        ScopeId.ScopeIdVarDecl: 'ScopeVarDecl',
+        ScopeId.ScopeIdCImport: 'ScopeCImport',
+        ScopeId.ScopeIdLoop: 'ScopeLoop',
+        ScopeId.ScopeIdSuspend: 'ScopeSuspend',
+        ScopeId.ScopeIdFnDef: 'ScopeFnDef',
+        ScopeId.ScopeIdCompTime: 'ScopeCompTime',
+        ScopeId.ScopeIdCoroPrelude: 'ScopeCoroPrelude',
+        ScopeId.ScopeIdRuntime: 'ScopeRuntime',
+    }
+    return variants.get(id)
+
+
+def tld_type_name(id):
+    """Returns the name of the struct a top level declaration with the
+    given id is cast to."""
+    variants = {
+        TldId.TldIdVar: 'TldVar',
+        TldId.TldIdFn: 'TldFn',
+        TldId.TldIdContainer: 'TldContainer',
+        TldId.TldIdCompTime: 'TldCompTime',
+    }
+    return variants.get(id)
 
 
 def ast_node_variant(node):
+    return ast_node_type_variant(NodeType(node['type']))
+
+
+def ast_node_type_variant(type):
     variants = {
         NodeType.NodeTypeFnDef: 'fn_def',
         NodeType.NodeTypeFnProto: 'fn_proto',
@@ -352,5 +453,4 @@ def ast_node_variant(node):
         NodeType.NodeTypeSuspend: 'suspend',
         NodeType.NodeTypePromiseType: 'promise_type',
     }
-    type = NodeType(node['type'])
     return variants.get(type)